@@ -8,6 +8,7 @@
 from .constraints import (
     Constraint,
     FollowingArrowsFraction,
+    GridStats,
     NumberFraction,
     PrefilledCellsFraction,
     RuleComplexityFraction,
@@ -19,6 +20,7 @@ __all__ = [
     "Generator",
     "GenerationStats",
     "Constraint",
+    "GridStats",
     "RuleComplexityFraction",
     "NumberFraction",
     "UsesRule",
@@ -5,18 +5,87 @@
 # the Free Software Foundation, either version 3 of the License, or
 # (at your option) any later version.
 
+import functools
 from abc import ABC, abstractmethod
+from collections import Counter
 from typing import Optional
 
-from japanese_arrows.models import Puzzle
+from japanese_arrows.models import Direction
 from japanese_arrows.solver import SolverResult
 
 
+class GridStats:
+    """
+    Grid statistics of a solver trace, computed lazily and shared between constraints,
+    so that checking several constraints on one trace traverses each grid only once.
+    """
+
+    def __init__(self, trace: SolverResult):
+        self.trace = trace
+
+    @functools.cached_property
+    def _solution_stats(self) -> tuple[Counter[int | None], int]:
+        puzzle = self.trace.puzzle
+        rows, cols = puzzle.rows, puzzle.cols
+        numbers = puzzle.numbers()
+        directions = puzzle.directions()
+
+        # Row step, column step and flat index offset of the next cell, per direction
+        steps = {}
+        for direction in Direction:
+            dr, dc = direction.delta
+            steps[direction] = (dr, dc, dr * cols + dc)
+
+        following_arrows = 0
+        i = 0
+        for r in range(rows):
+            for c in range(cols):
+                direction = directions[i]
+                dr, dc, offset = steps[direction]
+                if 0 <= r + dr < rows and 0 <= c + dc < cols and directions[i + offset] is direction:
+                    following_arrows += 1
+                i += 1
+        return Counter(numbers), following_arrows
+
+    @property
+    def number_counts(self) -> Counter[int | None]:
+        return self._solution_stats[0]
+
+    @property
+    def following_arrows_count(self) -> int:
+        return self._solution_stats[1]
+
+    @functools.cached_property
+    def prefilled_count(self) -> int:
+        puzzle = self.trace.initial_puzzle
+        if puzzle is None:
+            puzzle = self.trace.puzzle
+        return puzzle.rows * puzzle.cols - puzzle.numbers().count(None)
+
+
 class Constraint(ABC):
+    # Relative cost of checking the constraint, cheaper constraints are checked first
+    cost: int = 10
+    # Whether the constraint needs the steps of solving the puzzle from scratch, pre_check decides it otherwise
+    requires_clean_trace: bool = True
+
     @abstractmethod
     def check(self, trace: SolverResult) -> bool:
         pass
 
+    def check_with_stats(self, trace: SolverResult, stats: GridStats) -> bool:
+        """
+        Checks the constraint, reusing grid statistics shared with other constraints.
+        """
+        return self.check(trace)
+
+    def pre_check(self, trace: SolverResult, stats: GridStats) -> bool:
+        """
+        Checks the constraint on a preliminary trace, which only has the final puzzle and solution but no steps.
+        Returns False only if the constraint can not be satisfied. Constraints depending on steps always pass.
+        """
+        return True
+
     @property
     def name(self) -> str:
         return self.__class__.__name__
@@ -38,10 +107,9 @@ class RuleComplexityFraction(Constraint):
         self.max_count = max_count
 
     def check(self, trace: SolverResult) -> bool:
-        steps = trace.steps
-        total = len(steps)
+        total = len(trace.steps)
 
-        comp_apps = sum(1 for s in steps if s.rule_complexity == self.complexity)
+        comp_apps = trace.complexity_counts[self.complexity]
 
         if self.min_count is not None and comp_apps < self.min_count:
             return False
@@ -64,23 +132,27 @@ class RuleComplexityFraction(Constraint):
 
 
 class NumberFraction(Constraint):
+    cost = 2
+    requires_clean_trace = False
+
     def __init__(self, number: int, min_fraction: Optional[float] = None, max_fraction: Optional[float] = None):
         self.number = number
         self.min_fraction = min_fraction
         self.max_fraction = max_fraction
 
     def check(self, trace: SolverResult) -> bool:
+        return self.check_with_stats(trace, GridStats(trace))
+
+    def pre_check(self, trace: SolverResult, stats: GridStats) -> bool:
+        return self.check_with_stats(trace, stats)
+
+    def check_with_stats(self, trace: SolverResult, stats: GridStats) -> bool:
         puzzle = trace.puzzle
         total_cells = puzzle.rows * puzzle.cols
         if total_cells == 0:
             return True
 
-        count = 0
-        for row in puzzle.grid:
-            for cell in row:
-                if cell.number == self.number:
-                    count += 1
-
+        count = stats.number_counts[self.number]
         fraction = count / total_cells
 
         if self.min_fraction is not None and fraction < self.min_fraction:
@@ -98,10 +170,9 @@ class UsesRule(Constraint):
         self.min_fraction = min_fraction
 
     def check(self, trace: SolverResult) -> bool:
-        steps = trace.steps
-        total = len(steps)
+        total = len(trace.steps)
 
-        count = sum(1 for s in steps if s.rule_name == self.rule_name)
+        count = trace.rule_name_counts[self.rule_name]
 
         if self.min_count is not None and count < self.min_count:
             return False
@@ -117,29 +188,26 @@ class UsesRule(Constraint):
 
 
 class FollowingArrowsFraction(Constraint):
+    cost = 1
+    requires_clean_trace = False
+
     def __init__(self, min_fraction: Optional[float] = None, max_fraction: Optional[float] = None):
         self.min_fraction = min_fraction
         self.max_fraction = max_fraction
 
-    def _get_count(self, puzzle: Puzzle) -> int:
-        count = 0
-        for r in range(puzzle.rows):
-            for c in range(puzzle.cols):
-                cell = puzzle.grid[r][c]
-                dr, dc = cell.direction.delta
-                nr, nc = r + dr, c + dc
-                if 0 <= nr < puzzle.rows and 0 <= nc < puzzle.cols:
-                    if puzzle.grid[nr][nc].direction == cell.direction:
-                        count += 1
-        return count
-
     def check(self, trace: SolverResult) -> bool:
+        return self.check_with_stats(trace, GridStats(trace))
+
+    def pre_check(self, trace: SolverResult, stats: GridStats) -> bool:
+        return self.check_with_stats(trace, stats)
+
+    def check_with_stats(self, trace: SolverResult, stats: GridStats) -> bool:
         puzzle = trace.puzzle
         total_cells = puzzle.rows * puzzle.cols
         if total_cells == 0:
             return True
 
-        count = self._get_count(puzzle)
+        count = stats.following_arrows_count
         fraction = count / total_cells
 
         if self.min_fraction is not None and fraction < self.min_fraction:
@@ -151,11 +219,20 @@ class FollowingArrowsFraction(Constraint):
 
 
 class PrefilledCellsFraction(Constraint):
+    cost = 1
+    requires_clean_trace = False
+
     def __init__(self, min_fraction: Optional[float] = None, max_fraction: Optional[float] = None):
         self.min_fraction = min_fraction
         self.max_fraction = max_fraction
 
     def check(self, trace: SolverResult) -> bool:
+        return self.check_with_stats(trace, GridStats(trace))
+
+    def pre_check(self, trace: SolverResult, stats: GridStats) -> bool:
+        return self.check_with_stats(trace, stats)
+
+    def check_with_stats(self, trace: SolverResult, stats: GridStats) -> bool:
         puzzle = trace.initial_puzzle
         if puzzle is None:
             puzzle = trace.puzzle
@@ -164,7 +241,7 @@ class PrefilledCellsFraction(Constraint):
         if total_cells == 0:
             return True
 
-        count = sum(1 for row in puzzle.grid for cell in row if cell.number is not None)
+        count = stats.prefilled_count
         fraction = count / total_cells
 
         if self.min_fraction is not None and fraction < self.min_fraction:
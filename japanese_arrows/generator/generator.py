@@ -5,21 +5,43 @@
 # the Free Software Foundation, either version 3 of the License, or
 # (at your option) any later version.
 
-import copy
 import math
 import multiprocessing
+import queue
 import random
 import time
+from collections import Counter
 from dataclasses import dataclass, field
+from multiprocessing.pool import AsyncResult
+from typing import Any
 
 from joblib import effective_n_jobs
 
-from japanese_arrows.generator.constraints import Constraint
+from japanese_arrows.generator.constraints import Constraint, GridStats
 from japanese_arrows.models import Cell, Direction, Puzzle
-from japanese_arrows.solver import SolverResult, SolverStatus, compute_all_paths, create_solver
-
-
-@dataclass
+from japanese_arrows.solver import SolverResult, SolverStatus, compute_all_paths, compute_path, create_solver
+
+_CARDINAL_DIRECTIONS = (Direction.NORTH, Direction.EAST, Direction.SOUTH, Direction.WEST)
+_ALL_DIRECTIONS = _CARDINAL_DIRECTIONS + (
+    Direction.NORTH_EAST,
+    Direction.SOUTH_EAST,
+    Direction.SOUTH_WEST,
+    Direction.NORTH_WEST,
+)
+
+_OPPOSITE_DIRECTIONS = {
+    Direction.NORTH: Direction.SOUTH,
+    Direction.SOUTH: Direction.NORTH,
+    Direction.EAST: Direction.WEST,
+    Direction.WEST: Direction.EAST,
+    Direction.NORTH_EAST: Direction.SOUTH_WEST,
+    Direction.SOUTH_WEST: Direction.NORTH_EAST,
+    Direction.SOUTH_EAST: Direction.NORTH_WEST,
+    Direction.NORTH_WEST: Direction.SOUTH_EAST,
+}
+
+
+@dataclass(slots=True)
 class GenerationStats:
     puzzles_successfully_generated: int = 0
     puzzles_rejected_constraints: int = 0
@@ -34,6 +56,9 @@ class Generator:
     MAX_MODIFICATIONS_FRACTION = 0.1
     MAX_GUESSES_FRACTION = 0.15
 
+    def __init__(self, seed: int | None = None):
+        self._rng = random.Random(seed)
+
     def generate(
         self,
         rows: int,
@@ -46,8 +71,13 @@ class Generator:
     ) -> tuple[Puzzle | None, GenerationStats]:
         solver = create_solver(max_complexity=max_complexity)
         stats = _stats if _stats is not None else GenerationStats()
-        extra_fills = 0
-        guesses: list[tuple[int, int, int]] = []
+        # Copy, since the constraints are reordered between attempts
+        constraints = list(constraints)
+        max_guesses = max(math.ceil(rows * cols * self.MAX_GUESSES_FRACTION), 3)
+        max_modifications = max(math.ceil(rows * cols * self.MAX_MODIFICATIONS_FRACTION), 3)
+        allowed_dirs = _ALL_DIRECTIONS if allow_diagonals else _CARDINAL_DIRECTIONS
+        # Arrows at a contradiction are rotated to the next allowed direction
+        next_direction = {d: allowed_dirs[(i + 1) % len(allowed_dirs)] for i, d in enumerate(allowed_dirs)}
 
         while True:
             total_attempts = (
@@ -59,6 +89,11 @@ class Generator:
             if total_attempts >= max_attempts and max_attempts != -1:
                 return None, stats
 
+            # Check cheap constraints first, and among equally cheap ones those that rejected most often so far
+            constraints.sort(key=lambda c: (c.cost, -stats.rejections_per_constraint.get(c.name, 0)))
+            # The other constraints are fully decided by their pre-check
+            clean_trace_constraints = [c for c in constraints if c.requires_clean_trace]
+
             grid = self._create_random_grid(rows, cols, allow_diagonals)
 
             current_puzzle = Puzzle(rows=rows, cols=cols, grid=grid)
@@ -67,8 +102,12 @@ class Generator:
 
             path_cache = compute_all_paths(current_puzzle)
             reuse_candidates = False
-            base_puzzle = copy.deepcopy(current_puzzle)
+            base_puzzle = current_puzzle
             modifications = 0
+            extra_fills = 0
+            guesses: list[tuple[int, int, int]] = []
+            # Flat indices of cells that may still be empty, in row-major order
+            empty_cells = list(range(rows * cols))
 
             while True:
                 trace = solver.solve(
@@ -79,54 +118,63 @@ class Generator:
 
                 if trace.status == SolverStatus.SOLVED:
                     # Re-solve from scratch to ensure accurate complexity and rule counts
-                    clean_puzzle = copy.deepcopy(base_puzzle)
+                    # This attempt ends here either way, so the guesses can be applied to base_puzzle without a copy
+                    clean_puzzle = base_puzzle
                     for gr, gc, gval in guesses:
                         clean_puzzle.grid[gr][gc].number = gval
                         clean_puzzle.grid[gr][gc].candidates = {gval}
 
-                    final_trace = solver.solve(
-                        clean_puzzle,
-                        path_cache=path_cache,
-                        reuse_candidates=False,
+                    # The solution is already known, so constraints on the grid alone can be checked before re-solving
+                    preliminary_trace = SolverResult(
+                        status=trace.status,
+                        puzzle=trace.puzzle,
+                        max_complexity_used=0,
+                        rule_application_count=Counter(),
+                        initial_puzzle=clean_puzzle,
                     )
+                    failing_constraint = self._get_failing_pre_check(preliminary_trace, constraints)
+
+                    if failing_constraint is None and clean_trace_constraints:
+                        final_trace = solver.solve(
+                            clean_puzzle,
+                            path_cache=path_cache,
+                            reuse_candidates=False,
+                        )
+                        failing_constraint = self._get_failing_constraint(final_trace, clean_trace_constraints)
 
-                    failing_constraint = self._get_failing_constraint(final_trace, constraints)
                     if failing_constraint is None:
                         stats.puzzles_successfully_generated += 1
                         return clean_puzzle, stats
                     else:
                         stats.puzzles_rejected_constraints += 1
-                        stats.rejections_per_constraint[failing_constraint.name] = (
-                            stats.rejections_per_constraint.get(failing_constraint.name, 0) + 1
-                        )
+                        rejections = stats.rejections_per_constraint
+                        name = failing_constraint.name
+                        rejections[name] = rejections.get(name, 0) + 1
                         break
 
                 elif trace.status == SolverStatus.UNDERCONSTRAINED:
-                    limit = max(math.ceil(rows * cols * self.MAX_GUESSES_FRACTION), 3)
-                    if extra_fills >= limit:
+                    if extra_fills >= max_guesses:
                         stats.puzzles_rejected_excessive_guessing += 1
                         break
 
                     current_puzzle = trace.puzzle
 
-                    empty_cells = []
-                    for r in range(rows):
-                        for c in range(cols):
-                            if current_puzzle.grid[r][c].number is None:
-                                empty_cells.append((r, c))
+                    # Cells are only filled until the next reset, so only the previously empty ones are checked
+                    current_grid = current_puzzle.grid
+                    empty_cells = [i for i in empty_cells if current_grid[i // cols][i % cols].number is None]
 
                     if not empty_cells:
                         stats.puzzles_rejected_no_solution += 1
                         break
 
-                    r, c = random.choice(empty_cells)
+                    r, c = divmod(self._rng.choice(empty_cells), cols)
                     cell = current_puzzle.grid[r][c]
 
                     if not cell.candidates:
                         stats.puzzles_rejected_no_solution += 1
                         break
 
-                    val = random.choice(list(cell.candidates))
+                    val = self._rng.choice(list(cell.candidates))
 
                     cell.number = val
                     cell.candidates = {val}
@@ -138,7 +186,6 @@ class Generator:
                     # Continue inner loop
 
                 else:
-                    max_modifications = max(math.ceil(rows * cols * self.MAX_MODIFICATIONS_FRACTION), 3)
                     if modifications < max_modifications and trace.contradiction_location is not None:
                         # Contradiction found, try to rotate the arrow at the contradiction
                         r, c = trace.contradiction_location
@@ -146,24 +193,19 @@ class Generator:
                         # Modify the base puzzle (preserving prefilled numbers but resetting guesses)
                         current_dir = base_puzzle.grid[r][c].direction
 
-                        allowed_dirs = [Direction.NORTH, Direction.EAST, Direction.SOUTH, Direction.WEST]
-                        if allow_diagonals:
-                            allowed_dirs.extend(
-                                [Direction.NORTH_EAST, Direction.SOUTH_EAST, Direction.SOUTH_WEST, Direction.NORTH_WEST]
-                            )
-
-                        current_idx = allowed_dirs.index(current_dir) if current_dir in allowed_dirs else 0
-                        new_dir = allowed_dirs[(current_idx + 1) % len(allowed_dirs)]
+                        new_dir = next_direction.get(current_dir, allowed_dirs[1])
 
                         base_puzzle.grid[r][c].direction = new_dir
 
                         # Reset current_puzzle to base_puzzle (clears number guesses)
-                        current_puzzle = copy.deepcopy(base_puzzle)
+                        # No copy needed: the solver copies its input and guesses are made on the solver's copy
+                        current_puzzle = base_puzzle
                         extra_fills = 0
                         guesses = []
+                        empty_cells = list(range(rows * cols))
 
-                        # Recompute paths since arrows changed
-                        path_cache = compute_all_paths(current_puzzle)
+                        # Recompute the path of the rotated arrow, all other paths are unchanged
+                        path_cache[(r, c)] = compute_path(current_puzzle, r, c)
                         reuse_candidates = False
                         modifications += 1
                         continue
@@ -188,43 +230,72 @@ class Generator:
         last_logged_attempts = 0
 
         # Use multiprocessing.Pool to allow immediate termination of workers
-        pool = multiprocessing.Pool(processes=n_workers)
-        pending_results = []
+        # The arguments are the same for every task, so they are sent to each worker only once
+        pool = multiprocessing.Pool(
+            processes=n_workers,
+            initializer=_init_worker,
+            initargs=(
+                self,
+                {
+                    "rows": rows,
+                    "cols": cols,
+                    "allow_diagonals": allow_diagonals,
+                    "max_complexity": max_complexity,
+                    "constraints": constraints,
+                    "max_attempts": 1,
+                },
+            ),
+        )
+        # Keep a backlog of queued tasks, so that a worker picks up the next task as soon as it finishes one
+        backlog = 2 * n_workers
+        # Pending tasks in submission order, with the time they started running (None while still queued)
+        pending_results: list[tuple[float | None, AsyncResult[tuple[Puzzle | None, GenerationStats]]]] = []
+        # Timed out tasks can not be cancelled and keep their worker busy until they finish
+        stalled_results: list[AsyncResult[tuple[Puzzle | None, GenerationStats]]] = []
+        completions: queue.SimpleQueue[None] = queue.SimpleQueue()
+
+        def notify(_: object) -> None:
+            completions.put(None)
+
+        def submit() -> None:
+            pending_results.append(
+                (
+                    None,
+                    pool.apply_async(_generate_in_worker, callback=notify, error_callback=notify),
+                )
+            )
 
         try:
             # Initial submission of tasks
-            for _ in range(n_workers):
-                pending_results.append(
-                    (
-                        time.time(),
-                        pool.apply_async(
-                            self.generate,
-                            kwds={
-                                "rows": rows,
-                                "cols": cols,
-                                "allow_diagonals": allow_diagonals,
-                                "max_complexity": max_complexity,
-                                "constraints": constraints,
-                                "max_attempts": 1,
-                            },
-                        ),
-                    )
-                )
+            for _ in range(backlog):
+                submit()
 
             # Loop until we have enough puzzles
             while len(puzzles) < count:
+                # The pool runs tasks in submission order, so the first pending tasks fill the free workers
+                now = time.time()
+                stalled_results = [res for res in stalled_results if not res.ready()]
+                for i, (start_time, res) in enumerate(pending_results[: n_workers - len(stalled_results)]):
+                    if start_time is None:
+                        pending_results[i] = (now, res)
+
                 # Check for completed tasks
                 completed_indices = []
-                now = time.time()
                 for i, (start_time, res) in enumerate(pending_results):
                     if res.ready():
                         completed_indices.append(i)
-                    elif now - start_time > timeout_seconds:
+                    elif start_time is not None and now - start_time > timeout_seconds:
                         print(f"[Generator] Task timed out after {timeout_seconds}s")
                         completed_indices.append(i)
 
                 if not completed_indices:
-                    time.sleep(0.05)
+                    # Block until a task completes or the earliest running task times out
+                    start_times = [start for start, _ in pending_results if start is not None]
+                    wait_seconds = max(min(start_times) + timeout_seconds - now, 0) if start_times else None
+                    try:
+                        completions.get(timeout=wait_seconds)
+                    except queue.Empty:
+                        pass
                     continue
 
                 # Process completed tasks (in reverse order to pop safely)
@@ -234,6 +305,7 @@ class Generator:
                         if not res.ready():
                             # This was a timeout
                             total_stats.puzzles_rejected_timeout += 1
+                            stalled_results.append(res)
                         else:
                             res_puzzle, res_stats = res.get()
 
@@ -245,10 +317,9 @@ class Generator:
                                 res_stats.puzzles_rejected_excessive_guessing
                             )
                             total_stats.puzzles_rejected_timeout += res_stats.puzzles_rejected_timeout
+                            total_rejections = total_stats.rejections_per_constraint
                             for name, val in res_stats.rejections_per_constraint.items():
-                                total_stats.rejections_per_constraint[name] = (
-                                    total_stats.rejections_per_constraint.get(name, 0) + val
-                                )
+                                total_rejections[name] = total_rejections.get(name, 0) + val
 
                             if res_puzzle is not None:
                                 puzzles.append(res_puzzle)
@@ -274,22 +345,7 @@ class Generator:
                         pass
 
                     if len(puzzles) < count:
-                        pending_results.append(
-                            (
-                                time.time(),
-                                pool.apply_async(
-                                    self.generate,
-                                    kwds={
-                                        "rows": rows,
-                                        "cols": cols,
-                                        "allow_diagonals": allow_diagonals,
-                                        "max_complexity": max_complexity,
-                                        "constraints": constraints,
-                                        "max_attempts": 1,
-                                    },
-                                ),
-                            )
-                        )
+                        submit()
                     else:
                         break
 
@@ -301,22 +357,21 @@ class Generator:
         return puzzles, total_stats
 
     def _create_random_grid(self, rows: int, cols: int, allow_diagonals: bool) -> list[list[Cell]]:
-        grid = []
-        directions = [Direction.NORTH, Direction.EAST, Direction.SOUTH, Direction.WEST]
-        if allow_diagonals:
-            directions.extend([Direction.NORTH_EAST, Direction.SOUTH_EAST, Direction.SOUTH_WEST, Direction.NORTH_WEST])
-
-        for _ in range(rows):
-            row = []
-            for _ in range(cols):
-                d = random.choice(directions)
-                row.append(Cell(direction=d))
-            grid.append(row)
-        return grid
+        directions = _ALL_DIRECTIONS if allow_diagonals else _CARDINAL_DIRECTIONS
+        flat = self._rng.choices(directions, k=rows * cols)
+        return [[Cell(direction=d) for d in flat[r * cols : (r + 1) * cols]] for r in range(rows)]
 
     def _get_failing_constraint(self, trace: SolverResult, constraints: list[Constraint]) -> Constraint | None:
+        stats = GridStats(trace)
         for c in constraints:
-            if not c.check(trace):
+            if not c.check_with_stats(trace, stats):
+                return c
+        return None
+
+    def _get_failing_pre_check(self, trace: SolverResult, constraints: list[Constraint]) -> Constraint | None:
+        stats = GridStats(trace)
+        for c in constraints:
+            if not c.pre_check(trace, stats):
                 return c
         return None
 
@@ -326,8 +381,10 @@ class Generator:
         total_cells = rows * cols
         outward_arrows = []
 
+        # Only cells on the border can point out of the grid
         for r in range(rows):
-            for c in range(cols):
+            border_cols = range(cols) if r in (0, rows - 1) else sorted({0, cols - 1})
+            for c in border_cols:
                 cell = puzzle.grid[r][c]
                 dr, dc = cell.direction.delta
                 nr, nc = r + dr, c + dc
@@ -338,18 +395,25 @@ class Generator:
         num_to_flip = len(outward_arrows) - target_count
 
         if num_to_flip > 0:
-            opposites = {
-                Direction.NORTH: Direction.SOUTH,
-                Direction.SOUTH: Direction.NORTH,
-                Direction.EAST: Direction.WEST,
-                Direction.WEST: Direction.EAST,
-                Direction.NORTH_EAST: Direction.SOUTH_WEST,
-                Direction.SOUTH_WEST: Direction.NORTH_EAST,
-                Direction.SOUTH_EAST: Direction.NORTH_WEST,
-                Direction.NORTH_WEST: Direction.SOUTH_EAST,
-            }
-            to_flip = random.sample(outward_arrows, num_to_flip)
+            to_flip = self._rng.sample(outward_arrows, num_to_flip)
             for r, c in to_flip:
                 cell = puzzle.grid[r][c]
-                if cell.direction in opposites:
-                    cell.direction = opposites[cell.direction]
+                cell.direction = _OPPOSITE_DIRECTIONS[cell.direction]
+
+
+# Generator and generation arguments of a worker process, set once by the pool initializer
+_worker_generator: Generator | None = None
+_worker_kwargs: dict[str, Any] = {}
+
+
+def _init_worker(generator: Generator, kwargs: dict[str, Any]) -> None:
+    global _worker_generator, _worker_kwargs
+    # Every worker receives a copy of the same generator state, so draw a fresh seed per worker
+    generator._rng.seed()
+    _worker_generator = generator
+    _worker_kwargs = kwargs
+
+
+def _generate_in_worker() -> tuple[Puzzle | None, GenerationStats]:
+    assert _worker_generator is not None
+    return _worker_generator.generate(**_worker_kwargs)
@@ -7,7 +7,31 @@
 
 import math
 
-from japanese_arrows.models import Puzzle
+from japanese_arrows.models import Direction, Puzzle
+
+# Rotated arrow shape per direction, as consecutive output lines
+_ARROW_SHAPES = {
+    d: "\n".join(
+        [
+            f'<g transform="rotate({math.degrees(math.atan2(d.delta[0], d.delta[1]))})">',
+            '<path d="M -45 -25 Q -12 -30 20 -28 L 20 -48 Q 40 -25 55 0 Q 40 25 20 48 '
+            'L 20 28 Q -12 30 -45 25 Q -40 0 -45 -25 Z" '
+            'fill="white" stroke="#333333" stroke-width="3"/>',
+            "</g>",
+        ]
+    )
+    for d in Direction
+}
+
+# Offsets of single-digit candidates in the 3x3 layout, spacing 18px to fit in -30..30 box comfortably
+_CANDIDATE_SPACING = 18
+_CANDIDATE_OFFSETS = {0: (0, _CANDIDATE_SPACING)} | {
+    val: (((val - 1) % 3 - 1) * _CANDIDATE_SPACING, ((val - 1) // 3 - 1) * _CANDIDATE_SPACING) for val in range(1, 10)
+}
+_CANDIDATE_TEXTS = {
+    val: f'<text x="{dx}" y="{dy}" text-anchor="middle" dominant-baseline="central" class="candidate">{val}</text>'
+    for val, (dx, dy) in _CANDIDATE_OFFSETS.items()
+}
 
 
 def read_puzzle(file_path: str) -> Puzzle:
@@ -52,17 +76,7 @@ def write_puzzle_as_svg(puzzle: Puzzle, file_path: str, cell_size: int = 120) ->
             lines.append(f'<g transform="translate({cx},{cy})">')
 
             # Arrow Rotation
-            dr, dc = cell.direction.delta
-            angle_rad = math.atan2(dr, dc)
-            angle_deg = math.degrees(angle_rad)
-
-            lines.append(f'<g transform="rotate({angle_deg})">')
-            lines.append(
-                '<path d="M -45 -25 Q -12 -30 20 -28 L 20 -48 Q 40 -25 55 0 Q 40 25 20 48 '
-                'L 20 28 Q -12 30 -45 25 Q -40 0 -45 -25 Z" '
-                'fill="white" stroke="#333333" stroke-width="3"/>'
-            )
-            lines.append("</g>")
+            lines.append(_ARROW_SHAPES[cell.direction])
 
             # Content
             if cell.number is not None:
@@ -76,20 +90,7 @@ def write_puzzle_as_svg(puzzle: Puzzle, file_path: str, cell_size: int = 120) ->
 
                 if all_digits:
                     # 3x3 layout
-                    # Spacing 18px to fit in -30..30 box comfortably
-                    spacing = 18
-                    for val in sorted_cands:
-                        if val == 0:
-                            dx, dy = 0, spacing
-                        else:
-                            row_idx = (val - 1) // 3
-                            col_idx = (val - 1) % 3
-                            dx = (col_idx - 1) * spacing
-                            dy = (row_idx - 1) * spacing
-                        lines.append(
-                            f'<text x="{dx}" y="{dy}" text-anchor="middle" dominant-baseline="central" '
-                            f'class="candidate">{val}</text>'
-                        )
+                    lines.extend(_CANDIDATE_TEXTS[val] for val in sorted_cands)
                 else:
                     # Fallback for large numbers
                     cand_str = ",".join(str(x) for x in sorted_cands)
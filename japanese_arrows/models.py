@@ -30,20 +30,24 @@ class Direction(str, Enum):
 
     @property
     def delta(self) -> tuple[int, int]:
-        mapping = {
-            Direction.NORTH: (-1, 0),
-            Direction.NORTH_EAST: (-1, 1),
-            Direction.EAST: (0, 1),
-            Direction.SOUTH_EAST: (1, 1),
-            Direction.SOUTH: (1, 0),
-            Direction.SOUTH_WEST: (1, -1),
-            Direction.WEST: (0, -1),
-            Direction.NORTH_WEST: (-1, -1),
-        }
-        return mapping[self]
-
-
-@dataclass
+        return _DIRECTION_DELTAS[self]
+
+
+_DIRECTION_DELTAS = {
+    Direction.NORTH: (-1, 0),
+    Direction.NORTH_EAST: (-1, 1),
+    Direction.EAST: (0, 1),
+    Direction.SOUTH_EAST: (1, 1),
+    Direction.SOUTH: (1, 0),
+    Direction.SOUTH_WEST: (1, -1),
+    Direction.WEST: (0, -1),
+    Direction.NORTH_WEST: (-1, -1),
+}
+
+_DIRECTIONS_BY_CHAR = {d.value: d for d in Direction}
+
+
+@dataclass(slots=True)
 class Cell:
     direction: Direction
     number: int | None = None
@@ -53,17 +57,26 @@ class Cell:
         num_str = str(self.number) if self.number is not None else "."
         return f"{self.direction.value}{num_str}"
 
+    def clone(self) -> "Cell":
+        """
+        Returns an independent copy of the cell, cheaper than copy.deepcopy.
+        """
+        candidates = self.candidates.copy() if self.candidates is not None else None
+        return Cell(direction=self.direction, number=self.number, candidates=candidates)
+
     @classmethod
     def from_string(cls, text: str) -> "Cell":
         if len(text) != 2:
             raise ValueError(f"Invalid cell string: '{text}'")
-        direction = Direction(text[0])
+        direction = _DIRECTIONS_BY_CHAR.get(text[0])
+        if direction is None:
+            raise ValueError(f"Invalid direction in cell string: '{text}'")
         number_char = text[1]
         number = int(number_char) if number_char != "." else None
         return cls(direction=direction, number=number)
 
 
-@dataclass
+@dataclass(slots=True)
 class Puzzle:
     rows: int
     cols: int
@@ -76,6 +89,24 @@ class Puzzle:
             if len(row) != self.cols:
                 raise ValueError(f"Row {i} has {len(row)} cols, expected {self.cols}")
 
+    def clone(self) -> "Puzzle":
+        """
+        Returns an independent copy of the puzzle, cheaper than copy.deepcopy.
+        """
+        return Puzzle(self.rows, self.cols, [[cell.clone() for cell in row] for row in self.grid])
+
+    def numbers(self) -> list[int | None]:
+        """
+        Returns the numbers of all cells in row-major order.
+        """
+        return [cell.number for row in self.grid for cell in row]
+
+    def directions(self) -> list[Direction]:
+        """
+        Returns the directions of all cells in row-major order.
+        """
+        return [cell.direction for row in self.grid for cell in row]
+
     def validate(self) -> bool:
         """
         Validates if the puzzle solution is correct according to Japanese Arrows rules.
@@ -89,26 +120,10 @@ class Puzzle:
                     return False
 
                 # Count distinct numbers in path
-                path_values = set()
-                curr_r, curr_c = r, c
-                visited = {(r, c)}
-
-                # Traverse
                 dr, dc = cell.direction.delta
-                next_r, next_c = curr_r + dr, curr_c + dc
-
-                while 0 <= next_r < self.rows and 0 <= next_c < self.cols:
-                    if (next_r, next_c) in visited:
-                        break  # Cycle
-                    visited.add((next_r, next_c))
-
-                    target_cell = self.grid[next_r][next_c]
-                    if target_cell.number is not None:
-                        path_values.add(target_cell.number)
-
-                    # Move to next
-                    curr_r, curr_c = next_r, next_c
-                    next_r, next_c = curr_r + dr, curr_c + dc
+                length = ray_length(self.rows, self.cols, r, c, dr, dc)
+                path_values = {self.grid[r + k * dr][c + k * dc].number for k in range(1, length + 1)}
+                path_values.discard(None)
 
                 if cell.number != len(path_values):
                     return False
@@ -119,10 +134,7 @@ class Puzzle:
         border = "+" + "+".join(["----"] * self.cols) + "+"
         res.append(border)
         for row in self.grid:
-            row_str = "|"
-            for cell in row:
-                row_str += f" {cell} |"
-            res.append(row_str)
+            res.append("|" + "|".join(f" {cell} " for cell in row) + "|")
             res.append(border)
         return "\n".join(res) + "\n"
 
@@ -185,3 +197,19 @@ class Puzzle:
             res.append(border)
 
         return "\n".join(res) + "\n"
+
+
+def ray_length(rows: int, cols: int, r: int, c: int, dr: int, dc: int) -> int:
+    """
+    Returns the number of cells from (r, c) in direction (dr, dc) until the edge of the grid.
+    """
+    steps = max(rows, cols)
+    if dr > 0:
+        steps = min(steps, rows - 1 - r)
+    elif dr < 0:
+        steps = min(steps, r)
+    if dc > 0:
+        steps = min(steps, cols - 1 - c)
+    elif dc < 0:
+        steps = min(steps, c)
+    return steps
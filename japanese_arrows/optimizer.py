@@ -132,14 +132,11 @@ def substitute_conclusion(conclusion: Conclusion, var_name: str, replacement: Te
 def find_equality_substitution(conjuncts: list[Formula], var_name: str) -> Term | None:
     for conjunct in conjuncts:
         if isinstance(conjunct, Equality):
-            left_vars = get_free_variables(conjunct.left)
-            right_vars = get_free_variables(conjunct.right)
-
             if isinstance(conjunct.left, Variable) and conjunct.left.name == var_name:
-                if var_name not in right_vars:
+                if var_name not in get_free_variables(conjunct.right):
                     return conjunct.right
             if isinstance(conjunct.right, Variable) and conjunct.right.name == var_name:
-                if var_name not in left_vars:
+                if var_name not in get_free_variables(conjunct.left):
                     return conjunct.left
     return None
 
@@ -257,6 +254,8 @@ def minscope(phi: Formula) -> Formula:
         constructor = ExistsPosition if is_position else ExistsNumber
 
         current_conjuncts = list(conjuncts)
+        # Free variables of each current conjunct, computed once and updated when a quantifier is pushed
+        conjunct_vars = [get_free_variables(c) for c in current_conjuncts]
         retained_vars = []
 
         for v in phi.variables:
@@ -264,11 +263,15 @@ def minscope(phi: Formula) -> Formula:
 
             using_v = []
             not_using_v = []
-            for c in current_conjuncts:
-                if v_name in get_free_variables(c):
+            using_vars: list[set[str]] = []
+            not_using_vars: list[set[str]] = []
+            for c, c_vars in zip(current_conjuncts, conjunct_vars):
+                if v_name in c_vars:
                     using_v.append(c)
+                    using_vars.append(c_vars)
                 else:
                     not_using_v.append(c)
+                    not_using_vars.append(c_vars)
 
             if not_using_v and using_v:
                 if len(using_v) == 1:
@@ -279,6 +282,7 @@ def minscope(phi: Formula) -> Formula:
                 pushed_q = constructor([v], sub_formula)
 
                 current_conjuncts = not_using_v + [pushed_q]
+                conjunct_vars = not_using_vars + [set().union(*using_vars) - {v_name}]
             else:
                 if not using_v:
                     pass
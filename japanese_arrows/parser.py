@@ -63,6 +63,10 @@ TOKEN_PATTERNS = [
     (r"[a-zA-Z_]\w*", "IDENTIFIER"),
 ]
 
+# All token patterns as one regex, alternatives are tried in the order of TOKEN_PATTERNS
+_TOKEN_REGEX = re.compile("|".join(f"(?P<T{i}>{pattern})" for i, (pattern, _) in enumerate(TOKEN_PATTERNS)))
+_TOKEN_TYPES = {f"T{i}": type_ for i, (_, type_) in enumerate(TOKEN_PATTERNS)}
+
 
 class Token:
     def __init__(self, type: str, value: str, line: int):
@@ -79,26 +83,26 @@ def tokenize(text: str) -> list[Token]:
     line_num = 1
     pos = 0
     while pos < len(text):
-        match = None
-        for pattern, type_ in TOKEN_PATTERNS:
-            regex = re.compile(pattern)
-            match = regex.match(text, pos)
-            if match:
-                value = match.group(0)
-                if type_:
-                    tokens.append(Token(type_, value, line_num))
-                # Count newlines in whitespace or comments to update line number
-                line_num += value.count("\n")
-                pos = match.end()
-                break
+        match = _TOKEN_REGEX.match(text, pos)
         if not match:
             raise ValueError(f"Illegal character at line {line_num}: {text[pos]}")
+        # Every alternative is a named group, so the matching one is always known
+        assert match.lastgroup is not None
+        value = match.group(0)
+        type_ = _TOKEN_TYPES[match.lastgroup]
+        if type_:
+            tokens.append(Token(type_, value, line_num))
+        # Count newlines in whitespace or comments to update line number
+        line_num += value.count("\n")
+        pos = match.end()
     return tokens
 
 
 class RuleParser:
     def __init__(self, text: str):
         self.tokens = tokenize(text)
+        # End of input sentinel, so that the current token is always defined
+        self.tokens.append(Token("EOF", "", -1))
         self.pos = 0
 
     def parse_rule(self) -> FORule:
@@ -112,7 +116,7 @@ class RuleParser:
 
     def parse_conclusions(self) -> list[Conclusion]:
         conclusions = []
-        while self.pos < len(self.tokens) and self.current_token().type == "DOUBLE_ARROW":
+        while self.match("DOUBLE_ARROW"):
             self.consume("DOUBLE_ARROW")
             conclusions.append(self.parse_conclusion())
         return conclusions
@@ -315,8 +319,6 @@ class RuleParser:
 
     # Helper methods
     def current_token(self) -> Token:
-        if self.pos >= len(self.tokens):
-            return Token("EOF", "", -1)
         return self.tokens[self.pos]
 
     def advance(self) -> Token:
@@ -325,9 +327,7 @@ class RuleParser:
         return token
 
     def match(self, *types: str) -> bool:
-        if self.pos >= len(self.tokens):
-            return False
-        return self.current_token().type in types
+        return self.tokens[self.pos].type in types
 
     def consume(self, *types: str) -> Token:
         if self.match(*types):
@@ -6,9 +6,10 @@
 # (at your option) any later version.
 
 import itertools
+import operator
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, Any, Iterator
+from typing import TYPE_CHECKING, Any, Callable, Generator, Iterable, Iterator
 
 from japanese_arrows.models import Type
 
@@ -17,14 +18,22 @@ if TYPE_CHECKING:
 
 # --- Terms ---
 
+# Built-in arithmetic on Number terms
+ARITHMETIC_OPERATORS: dict[str, Callable[[int, int], int]] = {
+    "+": operator.add,
+    "-": operator.sub,
+}
+
 
 class Term(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def eval(self, universe: "Universe", assignment: dict[str, Any]) -> Any:
         pass
 
 
-@dataclass
+@dataclass(slots=True)
 class Variable(Term):
     name: str
 
@@ -35,7 +44,7 @@ class Variable(Term):
         return assignment[self.name]
 
 
-@dataclass
+@dataclass(slots=True)
 class Constant(Term):
     value: Any  # integers, "OOB", "nil", etc.
 
@@ -43,12 +52,10 @@ class Constant(Term):
         return str(self.value)
 
     def eval(self, universe: "Universe", assignment: dict[str, Any]) -> Any:
-        if isinstance(self.value, str) and self.value in universe.constants:
-            return universe.constants[self.value]
-        return self.value
+        return universe.constants.get(self.value, self.value)
 
 
-@dataclass
+@dataclass(slots=True)
 class FunctionCall(Term):
     name: str
     args: list[Term]
@@ -58,35 +65,39 @@ class FunctionCall(Term):
         return f"{self.name}({args_str})"
 
     def eval(self, universe: "Universe", assignment: dict[str, Any]) -> Any:
-        if self.name == "+":
+        arithmetic = ARITHMETIC_OPERATORS.get(self.name)
+        if arithmetic is not None:
             op_left = self.args[0].eval(universe, assignment)
             op_right = self.args[1].eval(universe, assignment)
-            if isinstance(op_left, int) and isinstance(op_right, int):
-                return op_left + op_right
-            return "nil"
-        if self.name == "-":
-            op_left = self.args[0].eval(universe, assignment)
-            op_right = self.args[1].eval(universe, assignment)
-            if isinstance(op_left, int) and isinstance(op_right, int):
-                return op_left - op_right
+            # Number terms are ints or "nil", so an exact type check suffices
+            if type(op_left) is int and type(op_right) is int:
+                return arithmetic(op_left, op_right)
             return "nil"
 
-        if self.name not in universe.functions:
+        function = universe.functions.get(self.name)
+        if function is None:
             raise ValueError(f"Unknown function: {self.name}")
-        args_values = [arg.eval(universe, assignment) for arg in self.args]
-        return universe.functions[self.name](tuple(args_values))
+        return function(tuple([arg.eval(universe, assignment) for arg in self.args]))
 
 
 # --- Formulas (Uses Terms) ---
 
 
 class Formula(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def check(self, universe: "Universe", assignment: dict[str, Any]) -> Iterator[dict[str, Any]]:
         pass
 
+    def holds(self, universe: "Universe", assignment: dict[str, Any]) -> bool:
+        """
+        Checks if the formula is true under the assignment, without collecting witnesses.
+        """
+        return next(self.check(universe, assignment), None) is not None
+
 
-@dataclass
+@dataclass(slots=True)
 class Not(Formula):
     formula: Formula
 
@@ -94,16 +105,18 @@ class Not(Formula):
         return f"~({self.formula})"
 
     def check(self, universe: "Universe", assignment: dict[str, Any]) -> Iterator[dict[str, Any]]:
-        first_inner = next(self.formula.check(universe, assignment), None)
-        if first_inner is None:
+        if not self.formula.holds(universe, assignment):
             yield {}
 
+    def holds(self, universe: "Universe", assignment: dict[str, Any]) -> bool:
+        return not self.formula.holds(universe, assignment)
+
 
 class Atom(Formula):
-    pass
+    __slots__ = ()
 
 
-@dataclass
+@dataclass(slots=True)
 class Relation(Atom):
     relation: str  # "<", ">", "points_at", etc. (excluding "=")
     args: list[Term]
@@ -116,16 +129,18 @@ class Relation(Atom):
         return f"{self.relation}({args_str})"
 
     def check(self, universe: "Universe", assignment: dict[str, Any]) -> Iterator[dict[str, Any]]:
-        args_values = [arg.eval(universe, assignment) for arg in self.args]
-        if self.relation not in universe.relations:
+        if self.holds(universe, assignment):
+            yield {}
+
+    def holds(self, universe: "Universe", assignment: dict[str, Any]) -> bool:
+        relation = universe.relations.get(self.relation)
+        if relation is None:
             raise ValueError(f"Unknown relation: {self.relation}")
 
-        is_true = universe.relations[self.relation](tuple(args_values))
-        if is_true:
-            yield {}
+        return bool(relation(tuple([arg.eval(universe, assignment) for arg in self.args])))
 
 
-@dataclass
+@dataclass(slots=True)
 class Equality(Atom):
     left: Term
     right: Term
@@ -134,13 +149,14 @@ class Equality(Atom):
         return f"{self.left} = {self.right}"
 
     def check(self, universe: "Universe", assignment: dict[str, Any]) -> Iterator[dict[str, Any]]:
-        left = self.left.eval(universe, assignment)
-        right = self.right.eval(universe, assignment)
-        if left == right:
+        if self.holds(universe, assignment):
             yield {}
 
+    def holds(self, universe: "Universe", assignment: dict[str, Any]) -> bool:
+        return bool(self.left.eval(universe, assignment) == self.right.eval(universe, assignment))
 
-@dataclass
+
+@dataclass(slots=True)
 class And(Formula):
     formulas: list[Formula]
 
@@ -161,8 +177,11 @@ class And(Formula):
         for w in first.check(universe, assignment):
             yield from self._check_recursive(universe, rest, assignment, combined | w)
 
+    def holds(self, universe: "Universe", assignment: dict[str, Any]) -> bool:
+        return all(f.holds(universe, assignment) for f in self.formulas)
+
 
-@dataclass
+@dataclass(slots=True)
 class Or(Formula):
     formulas: list[Formula]
 
@@ -170,15 +189,27 @@ class Or(Formula):
         return " v ".join(f"({f})" for f in self.formulas)
 
     def check(self, universe: "Universe", assignment: dict[str, Any]) -> Iterator[dict[str, Any]]:
+        yielded_empty = False
         for sub in self.formulas:
-            yield from sub.check(universe, assignment)
+            if yielded_empty and isinstance(sub, (Atom, Not)):
+                # Binds no variables, so it could only repeat the empty witness
+                continue
+            for witness in sub.check(universe, assignment):
+                if not witness:
+                    if yielded_empty:
+                        continue
+                    yielded_empty = True
+                yield witness
+
+    def holds(self, universe: "Universe", assignment: dict[str, Any]) -> bool:
+        return any(f.holds(universe, assignment) for f in self.formulas)
 
 
 class Quantifier(Formula):
-    pass
+    __slots__ = ()
 
 
-@dataclass
+@dataclass(slots=True)
 class ExistsPosition(Quantifier):
     variables: list[Variable]
     formula: Formula
@@ -188,28 +219,13 @@ class ExistsPosition(Quantifier):
         return f"exists_pos {vars_str} ({self.formula})"
 
     def check(self, universe: "Universe", assignment: dict[str, Any]) -> Iterator[dict[str, Any]]:
-        domain_type = Type.POSITION
-        elements = universe.domain.get(domain_type, set())
-        if universe.quantifier_exclusions and domain_type in universe.quantifier_exclusions:
-            elements = elements - universe.quantifier_exclusions[domain_type]
-
-        names = [v.name for v in self.variables]
-        try:
-            for values in itertools.product(elements, repeat=len(self.variables)):
-                current_witness: dict[str, Any] = {}
-                for name, val in zip(names, values):
-                    assignment[name] = val
-                    current_witness[name] = val
-
-                for inner_witness in self.formula.check(universe, assignment):
-                    yield current_witness | inner_witness
-        finally:
-            for name in names:
-                if name in assignment:
-                    del assignment[name]
-
-
-@dataclass
+        return _check_exists(self, Type.POSITION, universe, assignment)
+
+    def holds(self, universe: "Universe", assignment: dict[str, Any]) -> bool:
+        return _exists_holds(self, Type.POSITION, universe, assignment)
+
+
+@dataclass(slots=True)
 class ExistsNumber(Quantifier):
     variables: list[Variable]
     formula: Formula
@@ -219,28 +235,13 @@ class ExistsNumber(Quantifier):
         return f"exists_num {vars_str} ({self.formula})"
 
     def check(self, universe: "Universe", assignment: dict[str, Any]) -> Iterator[dict[str, Any]]:
-        domain_type = Type.NUMBER
-        elements = universe.domain.get(domain_type, set())
-        if universe.quantifier_exclusions and domain_type in universe.quantifier_exclusions:
-            elements = elements - universe.quantifier_exclusions[domain_type]
-
-        names = [v.name for v in self.variables]
-        try:
-            for values in itertools.product(elements, repeat=len(self.variables)):
-                current_witness: dict[str, Any] = {}
-                for name, val in zip(names, values):
-                    assignment[name] = val
-                    current_witness[name] = val
-
-                for inner_witness in self.formula.check(universe, assignment):
-                    yield current_witness | inner_witness
-        finally:
-            for name in names:
-                if name in assignment:
-                    del assignment[name]
-
-
-@dataclass
+        return _check_exists(self, Type.NUMBER, universe, assignment)
+
+    def holds(self, universe: "Universe", assignment: dict[str, Any]) -> bool:
+        return _exists_holds(self, Type.NUMBER, universe, assignment)
+
+
+@dataclass(slots=True)
 class ForAllPosition(Quantifier):
     variables: list[Variable]
     formula: Formula
@@ -250,29 +251,14 @@ class ForAllPosition(Quantifier):
         return f"forall_pos {vars_str} ({self.formula})"
 
     def check(self, universe: "Universe", assignment: dict[str, Any]) -> Iterator[dict[str, Any]]:
-        domain_type = Type.POSITION
-        elements = universe.domain.get(domain_type, set())
-        if universe.quantifier_exclusions and domain_type in universe.quantifier_exclusions:
-            elements = elements - universe.quantifier_exclusions[domain_type]
-
-        names = [v.name for v in self.variables]
-        try:
-            for values in itertools.product(elements, repeat=len(self.variables)):
-                for name, val in zip(names, values):
-                    assignment[name] = val
-
-                first_inner = next(self.formula.check(universe, assignment), None)
-                if first_inner is None:
-                    return
-        finally:
-            for name in names:
-                if name in assignment:
-                    del assignment[name]
+        if self.holds(universe, assignment):
+            yield {}
 
-        yield {}
+    def holds(self, universe: "Universe", assignment: dict[str, Any]) -> bool:
+        return _forall_holds(self, Type.POSITION, universe, assignment)
 
 
-@dataclass
+@dataclass(slots=True)
 class ForAllNumber(Quantifier):
     variables: list[Variable]
     formula: Formula
@@ -282,36 +268,169 @@ class ForAllNumber(Quantifier):
         return f"forall_num {vars_str} ({self.formula})"
 
     def check(self, universe: "Universe", assignment: dict[str, Any]) -> Iterator[dict[str, Any]]:
-        domain_type = Type.NUMBER
-        elements = universe.domain.get(domain_type, set())
-        if universe.quantifier_exclusions and domain_type in universe.quantifier_exclusions:
-            elements = elements - universe.quantifier_exclusions[domain_type]
-
-        names = [v.name for v in self.variables]
-        try:
-            for values in itertools.product(elements, repeat=len(self.variables)):
-                for name, val in zip(names, values):
-                    assignment[name] = val
-
-                first_inner = next(self.formula.check(universe, assignment), None)
-                if first_inner is None:
-                    return
-        finally:
-            for name in names:
-                if name in assignment:
-                    del assignment[name]
+        if self.holds(universe, assignment):
+            yield {}
 
-        yield {}
+    def holds(self, universe: "Universe", assignment: dict[str, Any]) -> bool:
+        return _forall_holds(self, Type.NUMBER, universe, assignment)
+
+
+# --- Quantifier evaluation ---
+
+# For each variable in binding order: its name, and the support table and first argument
+# of the relation restricting it, if any
+BindingPlan = list[tuple[str, Callable[[Any], Iterable[Any]] | None, Term | None]]
+
+
+def _check_exists(
+    quantifier: ExistsPosition | ExistsNumber, domain_type: Type, universe: "Universe", assignment: dict[str, Any]
+) -> Iterator[dict[str, Any]]:
+    names = [v.name for v in quantifier.variables]
+    conjuncts = quantifier.formula.formulas if isinstance(quantifier.formula, And) else [quantifier.formula]
+    bindings = _bind_variables(quantifier.variables, domain_type, conjuncts, universe, assignment)
+    try:
+        for _ in bindings:
+            current_witness = {name: assignment[name] for name in names}
+            for inner_witness in quantifier.formula.check(universe, assignment):
+                yield current_witness | inner_witness
+    finally:
+        bindings.close()
+
+
+def _exists_holds(
+    quantifier: ExistsPosition | ExistsNumber, domain_type: Type, universe: "Universe", assignment: dict[str, Any]
+) -> bool:
+    conjuncts = quantifier.formula.formulas if isinstance(quantifier.formula, And) else [quantifier.formula]
+    bindings = _bind_variables(quantifier.variables, domain_type, conjuncts, universe, assignment)
+    try:
+        for _ in bindings:
+            # Stop at the first satisfying assignment, no witness is needed
+            if quantifier.formula.holds(universe, assignment):
+                return True
+    finally:
+        bindings.close()
+    return False
+
+
+def _forall_holds(
+    quantifier: ForAllPosition | ForAllNumber, domain_type: Type, universe: "Universe", assignment: dict[str, Any]
+) -> bool:
+    # Implications are desugared to !A v B, only assignments satisfying the premise A need to be checked
+    formula = quantifier.formula
+    premises: list[Formula] = []
+    if isinstance(formula, Or) and formula.formulas and isinstance(formula.formulas[0], Not):
+        premise = formula.formulas[0].formula
+        premises = premise.formulas if isinstance(premise, And) else [premise]
+
+    bindings = _bind_variables(quantifier.variables, domain_type, premises, universe, assignment)
+    try:
+        for _ in bindings:
+            if not formula.holds(universe, assignment):
+                return False
+    finally:
+        bindings.close()
+    return True
+
+
+def _bind_variables(
+    variables: list[Variable],
+    domain_type: Type,
+    conjuncts: list[Formula],
+    universe: "Universe",
+    assignment: dict[str, Any],
+) -> Generator[None, None, None]:
+    """
+    Assigns all combinations of values to the variables which can satisfy the conjuncts,
+    yielding after each complete assignment.
+    """
+    elements = universe.effective_domain(domain_type)
+    plan = _binding_plan(variables, conjuncts, universe)
+    if plan is not None:
+        yield from _bind_planned(plan, elements, universe, assignment)
+        return
+
+    names = [v.name for v in variables]
+    try:
+        for values in itertools.product(elements, repeat=len(names)):
+            for name, val in zip(names, values):
+                assignment[name] = val
+            yield None
+    finally:
+        for name in names:
+            if name in assignment:
+                del assignment[name]
+
+
+def _binding_plan(variables: list[Variable], conjuncts: list[Formula], universe: "Universe") -> BindingPlan | None:
+    """
+    Orders the variables so that a variable v restricted by a conjunct rel(x, v), where rel has a support table,
+    is bound after x and only ranges over the support of x.
+    Returns None if no variable can be restricted.
+    """
+    if not universe.relation_supports:
+        return None
+
+    names = {v.name for v in variables}
+    restrictions: dict[str, list[tuple[Callable[[Any], Iterable[Any]], Term]]] = {}
+    for conjunct in conjuncts:
+        if not isinstance(conjunct, Relation) or len(conjunct.args) != 2:
+            continue
+        support = universe.relation_supports.get(conjunct.relation)
+        source, target = conjunct.args
+        if support is None or not isinstance(target, Variable) or target.name not in names:
+            continue
+        if isinstance(source, Constant) or (isinstance(source, Variable) and source.name != target.name):
+            restrictions.setdefault(target.name, []).append((support, source))
+    if not restrictions:
+        return None
+
+    plan: BindingPlan = []
+    remaining = [v.name for v in variables]
+    while remaining:
+        # Prefer a variable whose restriction only depends on already bound variables
+        choice: tuple[str, Callable[[Any], Iterable[Any]] | None, Term | None] = (remaining[0], None, None)
+        for name in remaining:
+            available = [
+                (support, source)
+                for support, source in restrictions.get(name, [])
+                if not (isinstance(source, Variable) and source.name in remaining)
+            ]
+            if available:
+                choice = (name, *available[0])
+                break
+        plan.append(choice)
+        remaining.remove(choice[0])
+    return plan
+
+
+def _bind_planned(
+    plan: BindingPlan, elements: tuple[Any, ...], universe: "Universe", assignment: dict[str, Any]
+) -> Generator[None, None, None]:
+    name, support, source = plan[0]
+    values = elements if support is None or source is None else support(source.eval(universe, assignment))
+    rest = plan[1:]
+    try:
+        for val in values:
+            assignment[name] = val
+            if rest:
+                yield from _bind_planned(rest, elements, universe, assignment)
+            else:
+                yield None
+    finally:
+        if name in assignment:
+            del assignment[name]
 
 
 # --- Conclusions (Uses Terms) ---
 
 
 class Conclusion(ABC):
+    __slots__ = ()
+
     position: Term
 
 
-@dataclass
+@dataclass(slots=True)
 class SetVal(Conclusion):
     position: Term
     value: Term
@@ -320,7 +439,7 @@ class SetVal(Conclusion):
         return f"set({self.position}, {self.value})"
 
 
-@dataclass
+@dataclass(slots=True)
 class ExcludeVal(Conclusion):
     position: Term
     operator: str
@@ -332,7 +451,7 @@ class ExcludeVal(Conclusion):
         return f"exclude({self.position}, {self.operator}{self.value})"
 
 
-@dataclass
+@dataclass(slots=True)
 class OnlyVal(Conclusion):
     position: Term
     values: list[Term]
@@ -346,11 +465,13 @@ class OnlyVal(Conclusion):
 
 
 class Rule(ABC):
+    __slots__ = ()
+
     name: str
     complexity: int
 
 
-@dataclass
+@dataclass(slots=True)
 class FORule(Rule):
     name: str
     condition: Formula
@@ -367,7 +488,7 @@ class FORule(Rule):
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class BacktrackRule(Rule):
     name: str
     complexity: int
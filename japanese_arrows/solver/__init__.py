@@ -5,7 +5,7 @@
 # the Free Software Foundation, either version 3 of the License, or
 # (at your option) any later version.
 
-from .definitions import ConclusionApplicationResult, compute_all_paths
+from .definitions import ConclusionApplicationResult, compute_all_paths, compute_path
 from .solver import (
     Solver,
     SolverResult,
@@ -22,4 +22,5 @@ __all__ = [
     "SolverStep",
     "ConclusionApplicationResult",
     "compute_all_paths",
+    "compute_path",
 ]
@@ -5,10 +5,12 @@
 # the Free Software Foundation, either version 3 of the License, or
 # (at your option) any later version.
 
+import functools
+from collections.abc import Iterable
 from enum import Enum
 from typing import Any, Callable, Set, Tuple
 
-from japanese_arrows.models import Direction, Puzzle, Type
+from japanese_arrows.models import Direction, Puzzle, Type, ray_length
 from japanese_arrows.universe import Universe
 
 
@@ -26,16 +28,33 @@ def compute_all_paths(puzzle: Puzzle) -> dict[tuple[int, int], list[tuple[int, i
     path_cache: dict[tuple[int, int], list[tuple[int, int]]] = {}
     for r in range(puzzle.rows):
         for c in range(puzzle.cols):
-            dr, dc = puzzle.grid[r][c].direction.delta
-            curr_r, curr_c = r + dr, c + dc
-            path = []
-            while 0 <= curr_r < puzzle.rows and 0 <= curr_c < puzzle.cols:
-                path.append((curr_r, curr_c))
-                curr_r, curr_c = curr_r + dr, curr_c + dc
-            path_cache[(r, c)] = path
+            path_cache[(r, c)] = compute_path(puzzle, r, c)
     return path_cache
 
 
+def compute_path(puzzle: Puzzle, r: int, c: int) -> list[tuple[int, int]]:
+    """
+    Computes the straight-line path of the arrow at (r, c).
+    It only depends on the direction of that arrow, so rotating an arrow only invalidates its own path.
+    Paths are shared between puzzles of the same size and must not be modified.
+    """
+    direction = puzzle.grid[r][c].direction
+    rays = _rays_for_size(puzzle.rows, puzzle.cols)
+    path = rays.get((r, c, direction))
+    if path is None:
+        dr, dc = direction.delta
+        length = ray_length(puzzle.rows, puzzle.cols, r, c, dr, dc)
+        path = [(r + k * dr, c + k * dc) for k in range(1, length + 1)]
+        rays[(r, c, direction)] = path
+    return path
+
+
+@functools.lru_cache(maxsize=16)
+def _rays_for_size(rows: int, cols: int) -> dict[tuple[int, int, Direction], list[tuple[int, int]]]:
+    # Filled lazily by compute_path, so that generating many puzzles of one size computes each ray once
+    return {}
+
+
 def create_universe(
     puzzle: Puzzle,
     path_cache: dict[tuple[int, int], list[tuple[int, int]]] | None = None,
@@ -58,6 +77,23 @@ def create_universe(
             ahead_cache[(r, c)] = len(path_cache[(r, c)])
     ahead_cache["OOB"] = 0
 
+    # Precompute behind values (purely geometric, never changes)
+    behind_cache: dict[Any, int] = {}
+    for r in range(puzzle.rows):
+        for c in range(puzzle.cols):
+            dr, dc = puzzle.grid[r][c].direction.delta
+            behind_cache[(r, c)] = ray_length(puzzle.rows, puzzle.cols, r, c, -dr, -dc)
+    behind_cache["OOB"] = 0
+
+    # Precompute next positions and directions (purely geometric, never changes)
+    next_cache: dict[Any, tuple[int, int] | str] = {"OOB": "OOB"}
+    dir_cache: dict[Any, Direction | str] = {"OOB": "nil"}
+    for r in range(puzzle.rows):
+        for c in range(puzzle.cols):
+            path = path_cache[(r, c)]
+            next_cache[(r, c)] = path[0] if path else "OOB"
+            dir_cache[(r, c)] = puzzle.grid[r][c].direction
+
     # Precompute points_at relations (purely geometric, never changes)
     points_at_cache: dict[tuple[Any, Any], bool] = {}
     for r in range(puzzle.rows):
@@ -100,16 +136,7 @@ def create_universe(
 
     # Helper for geometry
     def get_next(p: Position) -> Position:
-        if p == "OOB":
-            return "OOB"
-        r, c = p
-        cell = puzzle.grid[r][c]
-        dr, dc = cell.direction.delta
-        nr, nc = r + dr, c + dc
-
-        if 0 <= nr < rows and 0 <= nc < cols:
-            return (nr, nc)
-        return "OOB"
+        return next_cache[p]
 
     def get_path(p: Position) -> list[tuple[int, int]]:
         if p == "OOB":
@@ -133,23 +160,10 @@ def create_universe(
         return ahead_cache.get(p, 0)
 
     def behind(p: Position) -> int:
-        if p == "OOB":
-            return 0
-        r, c = p
-        cell = puzzle.grid[r][c]
-        dr, dc = cell.direction.delta
-        count = 0
-        curr_r, curr_c = r - dr, c - dc
-        while 0 <= curr_r < rows and 0 <= curr_c < cols:
-            count += 1
-            curr_r, curr_c = curr_r - dr, curr_c - dc
-        return count
+        return behind_cache.get(p, 0)
 
     def dir_of(p: Position) -> Direction | str:
-        if p == "OOB":
-            return "nil"
-        r, c = p
-        return puzzle.grid[r][c].direction
+        return dir_cache[p]
 
     def sees_distinct(p: Position) -> int:
         if p == "OOB":
@@ -298,12 +312,18 @@ def create_universe(
         Type.NUMBER: {"nil"},
     }
 
+    # points_at only depends on the static geometry, so its support is the path of the source
+    relation_supports: dict[str, Callable[[Any], Iterable[Any]]] = {
+        "points_at": lambda p: path_cache.get(p, []),
+    }
+
     return Universe(
         domain=domain,
         constants=constants,
         relations=relations,
         functions=functions,
         quantifier_exclusions=quantifier_exclusions,
+        relation_supports=relation_supports,
     )
 
 
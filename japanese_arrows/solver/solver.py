@@ -5,7 +5,7 @@
 # the Free Software Foundation, either version 3 of the License, or
 # (at your option) any later version.
 
-import copy
+import functools
 import time
 from collections import Counter
 from dataclasses import dataclass, field
@@ -75,6 +75,16 @@ class SolverResult:
     initial_puzzle: Puzzle | None = None
     contradiction_location: tuple[int, int] | None = None
 
+    @functools.cached_property
+    def complexity_counts(self) -> Counter[int]:
+        """Number of steps per rule complexity. Computed once, steps must not change afterwards."""
+        return Counter(s.rule_complexity for s in self.steps)
+
+    @functools.cached_property
+    def rule_name_counts(self) -> Counter[str]:
+        """Number of steps per rule name. Computed once, steps must not change afterwards."""
+        return Counter(s.rule_name for s in self.steps)
+
 
 class Solver:
     def __init__(self, rules: List[Rule]):
@@ -90,9 +100,9 @@ class Solver:
         if path_cache is None:
             path_cache = compute_all_paths(puzzle)
 
-        initial_puzzle_copy = copy.deepcopy(puzzle)
+        initial_puzzle_copy = puzzle.clone()
 
-        puzzle = copy.deepcopy(puzzle)
+        puzzle = puzzle.clone()
         if not reuse_candidates:
             self._initialize_candidates(puzzle)
 
@@ -201,7 +211,7 @@ class Solver:
                     rule_complexity=rule.complexity,
                     witness=witness,
                     conclusions_applied=applied_conclusions,
-                    puzzle_state=copy.deepcopy(puzzle),
+                    puzzle_state=puzzle.clone(),
                 )
                 return SolverResult(
                     status=SolverStatus.UNDERCONSTRAINED,
@@ -279,7 +289,7 @@ class Solver:
         for r, c, cands in candidates_map:
             for val in list(cands):
                 try:
-                    working_grid = copy.deepcopy(original_grid)
+                    working_grid = [[cell.clone() for cell in row] for row in original_grid]
                     puzzle.grid = working_grid
 
                     cell = puzzle.grid[r][c]
@@ -326,7 +336,7 @@ class Solver:
                             witness=backtrack_witness,
                             conclusions_applied=[conclusion],
                             contradiction_trace=[f"Assuming {r},{c} is {val}:"] + trace,
-                            puzzle_state=copy.deepcopy(puzzle),
+                            puzzle_state=puzzle.clone(),
                         )
                         return SolverResult(
                             status=SolverStatus.UNDERCONSTRAINED,
@@ -487,23 +497,34 @@ def create_solver(max_complexity: int | None = None, rules_file: str | Path | No
     else:
         rules_file = Path(rules_file)
 
-    # Load rules from YAML file
+    # The modification time is part of the cache key, so edited rule files are reloaded
+    loaded_rules = _load_rules(rules_file.resolve(), rules_file.stat().st_mtime_ns)
+    all_rules = [rule for rule in loaded_rules if max_complexity is None or rule.complexity <= max_complexity]
+
+    return Solver(all_rules)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_rules(rules_file: Path, mtime_ns: int) -> tuple[Rule, ...]:
+    """
+    Parses, type checks and optimizes all rules of a YAML rules file.
+    The result is cached per file version, so repeated solver creation skips this work.
+    """
     with open(rules_file) as f:
         rules_data = yaml.safe_load(f)
 
-    all_rules = []
+    rules: list[Rule] = []
     for rule_dict in rules_data:
         rule = parse_rule(rule_dict)
-        if max_complexity is None or rule.complexity <= max_complexity:
-            if isinstance(rule, FORule):
-                # Type check before optimization
-                check_rule(rule, TYPE_CONSTANTS, TYPE_FUNCTIONS, TYPE_RELATIONS)
+        if isinstance(rule, FORule):
+            # Type check before optimization
+            check_rule(rule, TYPE_CONSTANTS, TYPE_FUNCTIONS, TYPE_RELATIONS)
 
-                rule = optimize_rule(rule)
+            rule = optimize_rule(rule)
 
-                # Type check after optimization
-                check_rule(rule, TYPE_CONSTANTS, TYPE_FUNCTIONS, TYPE_RELATIONS)
+            # Type check after optimization
+            check_rule(rule, TYPE_CONSTANTS, TYPE_FUNCTIONS, TYPE_RELATIONS)
 
-            all_rules.append(rule)
+        rules.append(rule)
 
-    return Solver(all_rules)
+    return tuple(rules)
@@ -6,8 +6,8 @@
 # (at your option) any later version.
 
 # mypy: disable-error-code="attr-defined"
-from collections.abc import Iterator
-from dataclasses import dataclass
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
 from typing import Any, Callable
 
 from japanese_arrows.rules import (
@@ -24,10 +24,36 @@ class Universe:
     relations: dict[str, Callable[[tuple[Any, ...]], bool]]
     functions: dict[str, Callable[[tuple[Any, ...]], Any]]
     quantifier_exclusions: dict[Type, set[Any]] | None = None
+    # Maps a static binary relation to a function returning, for a first argument x,
+    # all domain elements y for which (x, y) is in the relation
+    relation_supports: dict[str, Callable[[Any], Iterable[Any]]] | None = None
+    _effective_domains: dict[Type, tuple[Any, ...]] = field(default_factory=dict, init=False, repr=False, compare=False)
 
     def __post_init__(self) -> None:
         if self.quantifier_exclusions is None:
             self.quantifier_exclusions = {}
+        if self.relation_supports is None:
+            self.relation_supports = {}
+
+    def effective_domain(self, domain_type: Type) -> tuple[Any, ...]:
+        """
+        Returns the elements quantifiers of the given type range over,
+        i.e. the domain without the quantifier exclusions.
+        """
+        elements = self._effective_domains.get(domain_type)
+        if elements is None:
+            domain = self.domain.get(domain_type, set())
+            if self.quantifier_exclusions and domain_type in self.quantifier_exclusions:
+                domain = domain - self.quantifier_exclusions[domain_type]
+            elements = tuple(domain)
+            self._effective_domains[domain_type] = elements
+        return elements
+
+    def invalidate_effective_domains(self) -> None:
+        """
+        Drops the cached quantifier domains. Must be called after mutating domain or quantifier_exclusions.
+        """
+        self._effective_domains.clear()
 
     def check(self, phi: Formula) -> dict[str, Any] | None:
         """
@@ -7,7 +7,12 @@
 
 import pytest
 
-from japanese_arrows.generator.constraints import Constraint, NumberFraction, RuleComplexityFraction
+from japanese_arrows.generator.constraints import (
+    Constraint,
+    FollowingArrowsFraction,
+    NumberFraction,
+    RuleComplexityFraction,
+)
 from japanese_arrows.generator.generator import Generator
 from japanese_arrows.models import Puzzle
 from japanese_arrows.solver import SolverStatus, create_solver
@@ -59,6 +64,45 @@ def test_generator_constraints() -> None:
     assert res.status == SolverStatus.SOLVED
 
 
+def test_generator_grid_constraints_only() -> None:
+    # Grid constraints are decided without re-solving the generated puzzle
+    gen = Generator()
+    constraint = FollowingArrowsFraction(max_fraction=0.3)
+
+    puzzle, stats = gen.generate(4, 4, True, 3, [constraint], max_attempts=200)
+
+    assert isinstance(puzzle, Puzzle)
+    assert stats.puzzles_successfully_generated == 1
+
+    solver = create_solver(max_complexity=3)
+    res = solver.solve(puzzle)
+    assert res.status == SolverStatus.SOLVED
+    assert constraint.check(res)
+
+
+def test_generator_seed_is_reproducible() -> None:
+    puzzle_a, _ = Generator(seed=7).generate(4, 4, True, 3, [])
+    puzzle_b, _ = Generator(seed=7).generate(4, 4, True, 3, [])
+
+    assert puzzle_a is not None
+    assert puzzle_a == puzzle_b
+
+
+def test_generator_resets_guesses_between_attempts() -> None:
+    # Guesses of a rejected attempt must not leak into the puzzle of a later attempt
+    constraint = FollowingArrowsFraction(max_fraction=0.15)
+    solver = create_solver(max_complexity=3)
+    rejected_attempts = 0
+
+    for seed in range(10):
+        puzzle, stats = Generator(seed=seed).generate(4, 4, True, 3, [constraint], max_attempts=50)
+        assert puzzle is not None
+        assert solver.solve(puzzle).status == SolverStatus.SOLVED
+        rejected_attempts += stats.puzzles_rejected_constraints + stats.puzzles_rejected_no_solution
+
+    assert rejected_attempts >= 1
+
+
 def test_generate_many() -> None:
     gen = Generator()
     constraints: list[Constraint] = []
@@ -5,24 +5,37 @@
 # the Free Software Foundation, either version 3 of the License, or
 # (at your option) any later version.
 
+from collections import Counter
+from typing import Any
 from unittest.mock import MagicMock
 
 from japanese_arrows.generator.constraints import (
     FollowingArrowsFraction,
+    GridStats,
     NumberFraction,
     PrefilledCellsFraction,
     RuleComplexityFraction,
     UsesRule,
 )
 from japanese_arrows.models import Cell, Direction, Puzzle
+from japanese_arrows.solver import SolverResult, SolverStatus
+
+
+def make_trace(steps: list[Any]) -> SolverResult:
+    return SolverResult(
+        status=SolverStatus.SOLVED,
+        puzzle=Puzzle(0, 0, []),
+        max_complexity_used=0,
+        rule_application_count=Counter(),
+        steps=steps,
+    )
 
 
 def test_rule_complexity_fraction_min() -> None:
     constraint = RuleComplexityFraction(complexity=2, min_fraction=0.4)
 
     # Case 1: No steps
-    trace = MagicMock()
-    trace.steps = []
+    trace = make_trace([])
     assert constraint.check(trace) is False
 
     # Case 2: Meet constraint exactly
@@ -37,16 +50,16 @@ def test_rule_complexity_fraction_min() -> None:
     step5 = MagicMock()
     step5.rule_complexity = 1
 
-    trace.steps = [step1, step2, step3, step4, step5]
+    trace = make_trace([step1, step2, step3, step4, step5])
     # 2/5 = 0.4 complexity 2 rules, should pass
     assert constraint.check(trace) is True
 
     # Case 3: Exceed constraint
-    trace.steps = [step1, step2, step1, step3, step4]  # 3/5 = 0.6 complexity 2
+    trace = make_trace([step1, step2, step1, step3, step4])  # 3/5 = 0.6 complexity 2
     assert constraint.check(trace) is True
 
     # Case 4: Below constraint
-    trace.steps = [step1, step3, step4, step5]  # 1/4 = 0.25 complexity 2
+    trace = make_trace([step1, step3, step4, step5])  # 1/4 = 0.25 complexity 2
     assert constraint.check(trace) is False
 
 
@@ -54,8 +67,7 @@ def test_rule_complexity_fraction_max() -> None:
     constraint = RuleComplexityFraction(complexity=2, max_fraction=0.5)
 
     # Case 1: No steps (default True for Max)
-    trace = MagicMock()
-    trace.steps = []
+    trace = make_trace([])
     assert constraint.check(trace) is True
 
     # Case 2: Meet constraint exactly
@@ -64,16 +76,16 @@ def test_rule_complexity_fraction_max() -> None:
     step2 = MagicMock()
     step2.rule_complexity = 1
 
-    trace.steps = [step1, step2]
+    trace = make_trace([step1, step2])
     # 1/2 = 0.5 rules are complexity 2, should pass
     assert constraint.check(trace) is True
 
     # Case 3: Below constraint
-    trace.steps = [step1, step2, step2]  # 1/3 = 0.33 are complexity 2
+    trace = make_trace([step1, step2, step2])  # 1/3 = 0.33 are complexity 2
     assert constraint.check(trace) is True
 
     # Case 4: Above constraint
-    trace.steps = [step1, step1, step2]  # 2/3 = 0.66 are complexity 2
+    trace = make_trace([step1, step1, step2])  # 2/3 = 0.66 are complexity 2
     assert constraint.check(trace) is False
 
 
@@ -85,18 +97,16 @@ def test_rule_complexity_fraction_range() -> None:
     step2 = MagicMock()
     step2.rule_complexity = 1
 
-    trace = MagicMock()
-
     # 1/4 = 0.25 (in range)
-    trace.steps = [step1, step2, step2, step2]
+    trace = make_trace([step1, step2, step2, step2])
     assert constraint.check(trace) is True
 
     # 1/10 = 0.1 (below range)
-    trace.steps = [step1] + [step2] * 9
+    trace = make_trace([step1] + [step2] * 9)
     assert constraint.check(trace) is False
 
     # 3/4 = 0.75 (above range)
-    trace.steps = [step1, step1, step1, step2]
+    trace = make_trace([step1, step1, step1, step2])
     assert constraint.check(trace) is False
 
 
@@ -109,25 +119,23 @@ def test_rule_complexity_fraction_counts() -> None:
     step2 = MagicMock()
     step2.rule_complexity = 1
 
-    trace = MagicMock()
-
     # 1 rule of complexity 2 -> False
-    trace.steps = [step1, step2]
+    trace = make_trace([step1, step2])
     assert constraint_min.check(trace) is False
 
     # 2 rules of complexity 2 -> True
-    trace.steps = [step1, step1, step2]
+    trace = make_trace([step1, step1, step2])
     assert constraint_min.check(trace) is True
 
     # Test max_count
     constraint_max = RuleComplexityFraction(complexity=2, max_count=2)
 
     # 2 rules of complexity 2 -> True
-    trace.steps = [step1, step1, step2]
+    trace = make_trace([step1, step1, step2])
     assert constraint_max.check(trace) is True
 
     # 3 rules of complexity 2 -> False
-    trace.steps = [step1, step1, step1, step2]
+    trace = make_trace([step1, step1, step1, step2])
     assert constraint_max.check(trace) is False
 
 
@@ -218,8 +226,7 @@ def test_uses_rule() -> None:
     step3 = MagicMock()
     step3.rule_name = "RULE_A"
 
-    trace = MagicMock()
-    trace.steps = [step1, step2, step3]
+    trace = make_trace([step1, step2, step3])
 
     # Rule A used twice
     constraint = UsesRule(rule_name="RULE_A", min_count=2)
@@ -269,3 +276,45 @@ def test_prefilled_cells_fraction() -> None:
     puzzle2 = Puzzle(2, 2, grid)
     trace.initial_puzzle = puzzle2
     assert PrefilledCellsFraction(min_fraction=0.7, max_fraction=0.8).check(trace) is True
+
+
+def test_grid_stats_shared_between_constraints() -> None:
+    # 1x3 grid: → → ←, solution numbers 1, 0, 1, (0,0) prefilled
+    solution = Puzzle(
+        1,
+        3,
+        [[Cell(Direction.EAST, number=1), Cell(Direction.EAST, number=0), Cell(Direction.WEST, number=1)]],
+    )
+    initial = Puzzle(1, 3, [[Cell(Direction.EAST, number=1), Cell(Direction.EAST), Cell(Direction.WEST)]])
+
+    trace = MagicMock()
+    trace.puzzle = solution
+    trace.initial_puzzle = initial
+
+    stats = GridStats(trace)
+    assert stats.number_counts[1] == 2
+    assert stats.number_counts[0] == 1
+    assert stats.following_arrows_count == 1
+    assert stats.prefilled_count == 1
+
+    assert NumberFraction(number=1, min_fraction=0.6).check_with_stats(trace, stats) is True
+    assert FollowingArrowsFraction(max_fraction=0.3).check_with_stats(trace, stats) is False
+    assert PrefilledCellsFraction(max_fraction=0.4).check_with_stats(trace, stats) is True
+
+
+def test_pre_check_only_rejects_grid_constraints() -> None:
+    solution = Puzzle(
+        1,
+        3,
+        [[Cell(Direction.EAST, number=1), Cell(Direction.EAST, number=0), Cell(Direction.WEST, number=1)]],
+    )
+    initial = Puzzle(1, 3, [[Cell(Direction.EAST, number=1), Cell(Direction.EAST), Cell(Direction.WEST)]])
+    trace = make_trace([])
+    trace.puzzle = solution
+    trace.initial_puzzle = initial
+    stats = GridStats(trace)
+
+    assert FollowingArrowsFraction(max_fraction=0.3).pre_check(trace, stats) is False
+    assert NumberFraction(number=1, min_fraction=0.6).pre_check(trace, stats) is True
+    assert RuleComplexityFraction(complexity=1, min_count=1).pre_check(trace, stats) is True
+    assert FollowingArrowsFraction.cost < RuleComplexityFraction.cost
@@ -5,6 +5,8 @@
 # the Free Software Foundation, either version 3 of the License, or
 # (at your option) any later version.
 
+import pytest
+
 from japanese_arrows.models import Cell, Direction, Puzzle
 
 
@@ -32,6 +34,9 @@ def test_cell_string() -> None:
     assert Cell.from_string("↑1") == c
     assert Cell.from_string("←.") == c_empty
 
+    with pytest.raises(ValueError):
+        Cell.from_string("x1")
+
 
 def test_puzzle_string() -> None:
     c1 = Cell(direction=Direction.NORTH)
@@ -45,3 +50,30 @@ def test_puzzle_string() -> None:
 """
     assert p.to_string() == expected_str
     assert Puzzle.from_string(expected_str) == p
+
+
+def test_puzzle_flat_views() -> None:
+    grid = [
+        [Cell(direction=Direction.NORTH), Cell(direction=Direction.EAST, number=1)],
+        [Cell(direction=Direction.SOUTH, number=0), Cell(direction=Direction.WEST)],
+    ]
+    p = Puzzle(rows=2, cols=2, grid=grid)
+
+    assert p.numbers() == [None, 1, 0, None]
+    assert p.directions() == [Direction.NORTH, Direction.EAST, Direction.SOUTH, Direction.WEST]
+
+
+def test_puzzle_clone() -> None:
+    grid = [
+        [Cell(direction=Direction.NORTH, candidates={0, 1}), Cell(direction=Direction.EAST, number=1)],
+    ]
+    p = Puzzle(rows=1, cols=2, grid=grid)
+
+    clone = p.clone()
+    assert clone == p
+
+    assert clone.grid[0][0].candidates is not None
+    clone.grid[0][0].candidates.add(2)
+    clone.grid[0][1].number = 0
+    assert p.grid[0][0].candidates == {0, 1}
+    assert p.grid[0][1].number == 1
@@ -5,7 +5,7 @@
 # the Free Software Foundation, either version 3 of the License, or
 # (at your option) any later version.
 
-from japanese_arrows.models import Cell, Direction, Puzzle
+from japanese_arrows.models import Cell, Direction, Puzzle, ray_length
 from japanese_arrows.rules import (
     Constant,
     Equality,
@@ -17,6 +17,7 @@ from japanese_arrows.rules import (
     Variable,
 )
 from japanese_arrows.solver import Solver, SolverStatus
+from japanese_arrows.solver.definitions import compute_all_paths, compute_path
 
 
 def create_simple_puzzle() -> Puzzle:
@@ -70,6 +71,35 @@ def test_create_universe_geometry() -> None:
     assert func_ahead(((0, 1),)) == 1  # (0,2)
     assert func_ahead(((0, 2),)) == 0
 
+    # Test behind
+    func_behind = universe.functions["behind"]
+    assert func_behind(((0, 0),)) == 0
+    assert func_behind(((0, 1),)) == 1  # (0,0)
+    assert func_behind(((0, 2),)) == 2  # (0,1), (0,0)
+    assert func_behind(("OOB",)) == 0
+
+
+def test_ray_length() -> None:
+    # 3x4 grid, from (1, 2)
+    assert ray_length(3, 4, 1, 2, 0, 1) == 1
+    assert ray_length(3, 4, 1, 2, 0, -1) == 2
+    assert ray_length(3, 4, 1, 2, -1, 0) == 1
+    assert ray_length(3, 4, 1, 2, 1, 1) == 1
+    assert ray_length(3, 4, 1, 2, 1, -1) == 1
+    assert ray_length(3, 4, 0, 3, 1, -1) == 2
+
+
+def test_compute_path_after_rotation() -> None:
+    grid = [[Cell(Direction.EAST), Cell(Direction.SOUTH)], [Cell(Direction.NORTH), Cell(Direction.WEST)]]
+    puzzle = Puzzle(2, 2, grid)
+    path_cache = compute_all_paths(puzzle)
+    assert path_cache[(0, 0)] == [(0, 1)]
+
+    puzzle.grid[0][0].direction = Direction.SOUTH_EAST
+    path_cache[(0, 0)] = compute_path(puzzle, 0, 0)
+    assert path_cache == compute_all_paths(puzzle)
+    assert path_cache[(0, 0)] == [(1, 1)]
+
 
 def test_create_universe_sees_distinct() -> None:
     # 1x4 grid with some filled values: → → → →
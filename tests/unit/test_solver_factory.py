@@ -54,3 +54,10 @@ def test_create_solver_default_loads_all_rules() -> None:
     rule_names = {rule.name for rule in solver.rules}
     assert "ARROW-POINTS-OOB" in rule_names
     assert "TEST-RULE-COMPLEXITY-2" in rule_names
+
+
+def test_create_solver_reuses_loaded_rules() -> None:
+    """Test that repeated solver creation reuses the parsed rules."""
+    first = create_solver(max_complexity=1, rules_file=TEST_RULES_FILE)
+    second = create_solver(rules_file=TEST_RULES_FILE)
+    assert first.rules[0] is second.rules[0]
@@ -9,11 +9,15 @@ from typing import Any, Callable
 
 from japanese_arrows.models import Type
 from japanese_arrows.rules import (
+    And,
     Constant,
     Equality,
     ExistsNumber,
     ExistsPosition,
+    ForAllPosition,
     FunctionCall,
+    Not,
+    Or,
     Relation,
     Variable,
 )
@@ -134,3 +138,116 @@ def test_universe_quantifier_exclusions() -> None:
     witness = u.check(formula_true)
     assert witness is not None
     assert witness["p"] == "p1"
+
+
+def test_universe_effective_domain_invalidation() -> None:
+    domain: dict[Type, set[Any]] = {Type.NUMBER: {1, 2, 3}}
+    u = Universe(domain, {}, {}, {}, quantifier_exclusions={Type.NUMBER: {3}})
+
+    assert sorted(u.effective_domain(Type.NUMBER)) == [1, 2]
+    assert u.effective_domain(Type.POSITION) == ()
+
+    u.domain[Type.NUMBER].add(4)
+    assert sorted(u.effective_domain(Type.NUMBER)) == [1, 2]
+
+    u.invalidate_effective_domains()
+    assert sorted(u.effective_domain(Type.NUMBER)) == [1, 2, 4]
+
+
+def test_universe_negated_exists() -> None:
+    domain: dict[Type, set[Any]] = {Type.POSITION: {"p1", "p2"}, Type.NUMBER: {1, 2}}
+
+    def val_func(args: tuple[Any, ...]) -> int:
+        return 1 if args[0] == "p1" else 2
+
+    u = Universe(domain, {}, {}, {"val": val_func})
+
+    v_p = Variable("p")
+    v_i = Variable("i")
+    has_value = ExistsPosition([v_p], Equality(FunctionCall("val", [v_p]), v_i))
+
+    # Only numbers that no position has as value
+    witnesses = list(u.check_all(ExistsNumber([v_i], Not(has_value))))
+    assert witnesses == []
+
+    u.domain[Type.NUMBER].add(3)
+    u.invalidate_effective_domains()
+    witnesses = list(u.check_all(ExistsNumber([v_i], Not(has_value))))
+    assert witnesses == [{"i": 3}]
+
+
+def test_universe_forall_uses_relation_support() -> None:
+    domain: dict[Type, set[Any]] = {Type.POSITION: {"p1", "p2", "p3"}}
+    pointed_at = {"p1": ["p2"], "p2": [], "p3": ["p1", "p2"]}
+    values = {"p1": 1, "p2": 2, "p3": 2}
+    relations: dict[str, Callable[[tuple[Any, ...]], bool]] = {
+        "points_at": lambda args: args[1] in pointed_at[args[0]],
+    }
+    functions: dict[str, Callable[[tuple[Any, ...]], Any]] = {"val": lambda args: values[args[0]]}
+
+    v_p = Variable("p")
+    v_q = Variable("q")
+    # exists p (forall q (points_at(p, q) -> val(q) = 2))
+    formula = ExistsPosition(
+        [v_p],
+        ForAllPosition(
+            [v_q],
+            Or([Not(Relation("points_at", [v_p, v_q])), Equality(FunctionCall("val", [v_q]), Constant(2))]),
+        ),
+    )
+
+    plain = Universe(domain, {}, relations, functions)
+    supported = Universe(domain, {}, relations, functions, relation_supports={"points_at": lambda p: pointed_at[p]})
+
+    expected = [{"p": "p1"}, {"p": "p2"}]
+    assert sorted(plain.check_all(formula), key=lambda w: w["p"]) == expected
+    assert sorted(supported.check_all(formula), key=lambda w: w["p"]) == expected
+
+
+def test_universe_exists_binds_restricted_variable_last() -> None:
+    domain: dict[Type, set[Any]] = {Type.POSITION: {"p1", "p2", "p3"}}
+    pointed_at = {"p1": ["p2"], "p2": [], "p3": ["p1", "p2"]}
+    values = {"p1": 1, "p2": 2, "p3": 2}
+    relations: dict[str, Callable[[tuple[Any, ...]], bool]] = {
+        "points_at": lambda args: args[1] in pointed_at[args[0]],
+    }
+    functions: dict[str, Callable[[tuple[Any, ...]], Any]] = {"val": lambda args: values[args[0]]}
+
+    v_p = Variable("p")
+    v_q = Variable("q")
+    # exists q, p (points_at(p, q) ^ val(p) = val(q)), q is listed first but restricted by p
+    formula = ExistsPosition(
+        [v_q, v_p],
+        And([Relation("points_at", [v_p, v_q]), Equality(FunctionCall("val", [v_p]), FunctionCall("val", [v_q]))]),
+    )
+
+    plain = Universe(domain, {}, relations, functions)
+    supported = Universe(domain, {}, relations, functions, relation_supports={"points_at": lambda p: pointed_at[p]})
+
+    assert list(plain.check_all(formula)) == [{"p": "p3", "q": "p2"}]
+    assert list(supported.check_all(formula)) == [{"p": "p3", "q": "p2"}]
+    assert supported.check(Not(formula)) is None
+
+
+def test_universe_or_yields_unbound_witness_once() -> None:
+    domain: dict[Type, set[Any]] = {Type.NUMBER: {1, 2, 3}}
+    u = Universe(domain, {}, {}, {})
+
+    v_i = Variable("i")
+    v_j = Variable("j")
+    # Both disjuncts hold for i = 1, but only the quantified one adds bindings
+    formula = ExistsNumber(
+        [v_i],
+        Or(
+            [
+                Equality(v_i, Constant(1)),
+                Equality(v_i, v_i),
+                ExistsNumber([v_j], Equality(v_j, v_i)),
+            ]
+        ),
+    )
+
+    witnesses = list(u.check_all(formula))
+    assert witnesses.count({"i": 1}) == 1
+    assert witnesses.count({"i": 1, "j": 1}) == 1
+    assert len(witnesses) == 6